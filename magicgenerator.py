@@ -1,21 +1,91 @@
 import argparse
 import configparser
+import functools
 import json
 import logging
 import multiprocessing
 import os
 import random
+import re
 import sys
 import time
-import uuid
-import ast
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+FLUSH_LINES = 4096
+OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+CHOICES_RANGE_LIMIT = 1 << 32
+NUMPY_MIN_BATCH = FLUSH_LINES
+
+_SCHEMA_VALUE_RE = re.compile(r'\s*(?:timestamp|str|int)\s*:')
+_RAND_RANGE_RE = re.compile(r'rand\(\s*([+-]?\d+)\s*,\s*([+-]?\d+)\s*\)')
+
+_ENCODE = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(',', ':')).encode
+_ENCODE_ASCII = json.JSONEncoder(check_circular=False, separators=(',', ':')).encode
+
+if orjson is not None:
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumps(obj):
+        return _ENCODE(obj).encode('utf-8')
+    _loads = json.loads
+
+
+_UUID_VARIANT = {digit: '89ab'[int(digit, 16) & 3] for digit in '0123456789abcdef'}
+
+
+def _uuid4_str(urandom=os.urandom, variant=_UUID_VARIANT):
+    h = urandom(16).hex()
+    return f'{h[:8]}-{h[8:12]}-4{h[13:16]}-{variant[h[16]]}{h[17:20]}-{h[20:]}'
+
+
+@functools.lru_cache(maxsize=None)
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
 
 
 class DataGenerator:
     def __init__(self, defaults=None):
         self.defaults = defaults or {}
         self.logger = self.setup_logging()
+        self._rng = random.Random()
+        self._compilers = {
+            'timestamp': self._compile_timestamp,
+            'str': self._compile_string,
+            'int': self._compile_integer,
+        }
+        self._seed = None
+        self._np_rng = None
+
+    def seed(self, seed):
+        self._rng.seed(seed)
+        self._seed = seed
+        self._np_rng = None
+
+    def _numpy_rng(self):
+        if self._np_rng is None:
+            np = _import_numpy()
+            if np is not None:
+                self._np_rng = np.random.default_rng(self._seed)
+        return self._np_rng
     
     def setup_logging(self):
         logger = logging.getLogger(__name__)
@@ -31,7 +101,7 @@ class DataGenerator:
         logger.addHandler(ch)
 
         log_file = self.defaults.get('log_file', 'magicgenerator.log')
-        fh = logging.FileHandler(log_file)
+        fh = logging.FileHandler(log_file, delay=True)
         fh.setLevel(logging.INFO)
         fh.setFormatter(fmt)
         logger.addHandler(fh)
@@ -42,13 +112,13 @@ class DataGenerator:
 
         try:
             if os.path.isfile(schema_input):
-                with open(schema_input, 'r') as f:
-                    schema = json.load(f)
+                with open(schema_input, 'rb') as f:
+                    schema = _loads(f.read())
             else:
-                schema = json.loads(schema_input)
+                schema = _loads(schema_input)
             
             self.validate_schema(schema)
-            return schema
+            return dict(schema)
         except json.JSONDecodeError as e:
             self.logger.exception(f"Invalid JSON schema: {e}")
             sys.exit(1)
@@ -63,138 +133,226 @@ class DataGenerator:
             self.logger.error("Schema must be a dictionary")
             sys.exit(1)
 
-        for key, value in schema.items():
-            if not isinstance(value, str):
-                self.logger.error(f"Schema value for '{key}' must be a string")
-                sys.exit(1)
+        match = _SCHEMA_VALUE_RE.match
+        if not all(type(value) is str and match(value) for value in schema.values()):
+            for key, value in schema.items():
+                if not isinstance(value, str):
+                    self.logger.error(f"Schema value for '{key}' must be a string")
+                    sys.exit(1)
 
-            if ':' not in value:
-                self.logger.error(f"Schema value for '{key}' must contain ':' separator")
-                sys.exit(1)
+                if _SCHEMA_VALUE_RE.match(value) is not None:
+                    continue
 
-            left_type = value.split(':', 1)[0].strip()
-            if left_type not in ('timestamp', 'str', 'int'):
+                if ':' not in value:
+                    self.logger.error(f"Schema value for '{key}' must contain ':' separator")
+                    sys.exit(1)
+
+                left_type = value.split(':', 1)[0].strip()
                 self.logger.error(f"Unsupported field type in schema for '{key}': {left_type}")
                 sys.exit(1)
 
+        for key, value in schema.items():
+            field_type, value_spec = value.split(':', 1)
+            if field_type.strip() == 'timestamp' and value_spec.strip():
+                self.logger.warning(f"Timestamp field '{key}' ignores value specification: {value_spec.strip()}")
+
     
     def generate_value(self, field_type, value_spec):
-        try:
-            if field_type == 'timestamp':
-                if value_spec and value_spec.strip():
-                    self.logger.warning(f"Timestamp field ignores value specification: {value_spec}")
-                return str(time.time())
-            
-            elif field_type == 'str':
-                return self.generate_string(value_spec)
+        return self.compile_value(field_type, value_spec)()
+    
+    def generate_string(self, value_spec):
+        return self.compile_value('str', value_spec)()
+    
+    def generate_integer(self, value_spec):
+        return self.compile_value('int', value_spec)()
+    
+    def compile_schema(self, schema):
+        return self._compile_fields(schema, self._compile_value)
 
-            elif field_type == 'int':
-                return self.generate_integer(value_spec)
-            
-            else:
-                self.logger.error(f"Unsupported field type: {field_type}")
+    def _compile_fields(self, schema, compile_field):
+        compiled = []
+        for key, value_spec in schema.items():
+            try:
+                field_type, spec = value_spec.split(':', 1)
+                compiled.append((key, compile_field(field_type.strip(), spec.strip())))
+            except ValueError as e:
+                self.logger.error(f"Invalid schema value for '{key}': {e}")
                 sys.exit(1)
-                
-        except Exception:
-            self.logger.exception(f"Error generating value for type '{field_type}'")
+        return compiled
+
+    def compile_value(self, field_type, value_spec):
+        try:
+            return self._compile_value(field_type, value_spec.strip())
+        except ValueError as e:
+            self.logger.error(str(e))
             sys.exit(1)
-    
-    def generate_string(self, value_spec):
-        value_spec = value_spec.strip()
-        
+
+    def _compile_value(self, field_type, value_spec):
+        compiler = self._compilers.get(field_type)
+        if compiler is None:
+            raise ValueError(f"Unsupported field type: {field_type}")
+        return compiler(value_spec)
+
+    def _compile_timestamp(self, value_spec):
+        return lambda now=time.time: str(now())
+
+    def _compile_string(self, value_spec):
         if value_spec == 'rand':
-            return str(uuid.uuid4())
-        
+            return _uuid4_str
+
         elif value_spec.startswith('rand(') and value_spec.endswith(')'):
-            self.logger.error(f"Invalid rand(range) usage for string type: {value_spec}")
-            sys.exit(1)
+            raise ValueError(f"Invalid rand(range) usage for string type: {value_spec}")
 
         elif value_spec.startswith('[') and value_spec.endswith(']'):
-            try:
-                try:
-                    choices = json.loads(value_spec)
-                except json.JSONDecodeError:
-                    choices = ast.literal_eval(value_spec)
-
-                if not isinstance(choices, list):
-                    raise ValueError("Not a list")
-                return random.choice(choices)
-            except:
-                self.logger.exception(f"Invalid list format for string: {value_spec}")
-                sys.exit(1)
-        
-        elif not value_spec:
-            return "" 
-        else:
-            return value_spec
+            choices = self._parse_choices(value_spec, 'string')
+            return lambda c=choices, choice=self._rng.choice: choice(c)
 
-    
-    
-    def generate_integer(self, value_spec):
-        value_spec = value_spec.strip()
-        
+        return lambda v=value_spec: v
+
+    def _compile_integer(self, value_spec):
         if value_spec == 'rand':
-            return random.randint(0, 10000)
-        
+            return lambda randint=self._rng.randint: randint(0, 10000)
+
         elif value_spec.startswith('rand(') and value_spec.endswith(')'):
-            try:
-                range_str = value_spec[5:-1]
-                parts = range_str.split(',')
-                if len(parts) != 2:
-                    raise ValueError("Invalid range format")
-                start, end = int(parts[0].strip()), int(parts[1].strip())
-                return random.randint(start, end)
-            except Exception as e:
-                self.logger.exception(f"Invalid rand range for integer: {value_spec} - {e}")
-                sys.exit(1)
-        
+            start, end = self._parse_rand_range(value_spec)
+            return lambda a=start, b=end, randint=self._rng.randint: randint(a, b)
+
         elif value_spec.startswith('[') and value_spec.endswith(']'):
-            try:
-                try:
-                    choices = json.loads(value_spec)
-                except json.JSONDecodeError:
-                    choices = ast.literal_eval(value_spec)
-
-                if not isinstance(choices, list):
-                    raise ValueError("Not a list")
-                return random.choice(choices)
-            except:
-                self.logger.exception(f"Invalid list format for integer: {value_spec}")
-                sys.exit(1)
-        
+            choices = self._parse_choices(value_spec, 'integer')
+            return lambda c=choices, choice=self._rng.choice: choice(c)
+
         elif not value_spec:
-            return None
-        
+            return lambda: None
+
+        try:
+            value = int(value_spec)
+        except ValueError:
+            raise ValueError(f"Cannot convert '{value_spec}' to integer") from None
+        return lambda v=value: v
+
+    def compile_template(self, schema):
+        fields = []
+        columns = []
+        for key, (value, column) in self._compile_fields(schema, self._compile_template_field):
+            if column is not None:
+                columns.append(column)
+            fields.append(_ENCODE_ASCII(key).replace('%', '%%') + ':' + value)
+        return '{' + ','.join(fields) + '}', columns
+
+    def _compile_template_field(self, field_type, value_spec):
+        if field_type == 'timestamp':
+            return '"%s"', lambda size, now=time.time: [str(now())] * size
+
+        elif field_type in ('str', 'int') and value_spec.startswith('[') and value_spec.endswith(']'):
+            choices = self._parse_choices(value_spec, 'string' if field_type == 'str' else 'integer')
+            return '%s', self._sample_column([_ENCODE_ASCII(choice) for choice in choices])
+
+        elif field_type == 'str' and value_spec == 'rand':
+            return '"%s"', lambda size: [_uuid4_str() for _ in range(size)]
+
+        elif field_type == 'int' and value_spec == 'rand':
+            return '%s', self._int_column(0, 10000)
+
+        elif field_type == 'int' and value_spec.startswith('rand(') and value_spec.endswith(')'):
+            return '%s', self._int_column(*self._parse_rand_range(value_spec))
+
+        fn = self._compile_value(field_type, value_spec)
+        return _ENCODE_ASCII(fn()).replace('%', '%%'), None
+
+    def _int_column(self, start, end):
+        if end - start < CHOICES_RANGE_LIMIT:
+            population = range(start, end + 1)
+            fallback = lambda size, sample=self._rng.choices: sample(population, k=size)
         else:
+            fallback = lambda size, randint=self._rng.randint: [randint(start, end) for _ in range(size)]
+
+        if not (INT64_MIN <= start and end < INT64_MAX):
+            return fallback
+
+        def column(size):
+            if size >= NUMPY_MIN_BATCH:
+                rng = self._numpy_rng()
+                if rng is not None:
+                    return rng.integers(start, end + 1, size).tolist()
+            return fallback(size)
+        return column
+
+    def _sample_column(self, population):
+        sample = self._rng.choices
+
+        def column(size):
+            if size >= NUMPY_MIN_BATCH:
+                rng = self._numpy_rng()
+                if rng is not None:
+                    return list(map(population.__getitem__, rng.integers(0, len(population), size).tolist()))
+            return sample(population, k=size)
+        return column
+
+    def _parse_choices(self, value_spec, type_name):
+        try:
+            choices = json.loads(value_spec)
+        except json.JSONDecodeError:
+            import ast
             try:
-                return int(value_spec)
-            except ValueError:
-                self.logger.exception(f"Cannot convert '{value_spec}' to integer")
-                sys.exit(1)
+                choices = ast.literal_eval(value_spec)
+            except (ValueError, SyntaxError):
+                choices = None
+
+        if not isinstance(choices, list):
+            raise ValueError(f"Invalid list format for {type_name}: {value_spec}")
+        if not choices:
+            raise ValueError(f"Empty list for {type_name}: {value_spec}")
+        return choices
+
+    def _parse_rand_range(self, value_spec):
+        match = _RAND_RANGE_RE.fullmatch(value_spec)
+        if match is None:
+            raise ValueError(f"Invalid rand range for integer: {value_spec}")
+        start, end = int(match[1]), int(match[2])
+        if start > end:
+            raise ValueError(f"Empty rand range for integer: {value_spec}")
+        return start, end
+
+    def compile_line(self, compiled):
+        params = ', '.join(f'_f{i}=_f{i}' for i in range(len(compiled)))
+        items = ', '.join(f'{key!r}: _f{i}()' for i, (key, _) in enumerate(compiled))
+        source = f'def generate_line({params}):\n    return {{{items}}}\n'
+
+        namespace = {f'_f{i}': fn for i, (_, fn) in enumerate(compiled)}
+        exec(compile(source, '<schema>', 'exec'), namespace)
+        return namespace['generate_line']
 
-    
-    
     def generate_line(self, schema):
-        line = {}
-        for key, value_spec in schema.items():
-            field_type, spec = value_spec.split(':', 1)
-            line[key] = self.generate_value(field_type.strip(), spec.strip())
-        return line
+        if isinstance(schema, dict):
+            schema = self.compile_schema(schema)
+        return {key: fn() for key, fn in schema}
     
-    def generate_file(self, args, file_index, total_files):
+    def generate_file(self, args, file_index, total_files, template=None):
         try:
             filename = self.generate_filename(args, file_index, total_files)
-            filepath = os.path.join(args.path_to_save_files, filename)
+            filepath_prefix = getattr(args, 'filepath_prefix', None)
+            if filepath_prefix is None:
+                filepath = os.path.join(args.path_to_save_files, filename)
+            else:
+                filepath = filepath_prefix + filename
             
             self.logger.info(f"Generating file: {filename}")
             
-            with open(filepath, 'w') as f:
-                for i in range(args.data_lines):
-                    line = self.generate_line(args.data_schema)
-                    f.write(json.dumps(line) + '\n')
-                    
-                    if args.files_count == 0 and i == 0:
-                        print(json.dumps(line))
+            if template is None:
+                template = self.compile_template(args.data_schema)
+            template, columns = template
+            chunks = self._iter_template_chunks(template, columns, args.data_lines)
+
+            fd = os.open(filepath, OPEN_FLAGS, 0o666)
+            try:
+                preview = args.files_count == 0
+                for chunk in chunks:
+                    if preview:
+                        print(chunk[:chunk.index(b'\n')].decode('utf-8'))
+                        preview = False
+                    _write_all(fd, chunk)
+            finally:
+                os.close(fd)
             
             self.logger.info(f"Completed file: {filename}")
             return filename
@@ -203,6 +361,17 @@ class DataGenerator:
             self.logger.exception(f"Error generating file {file_index}")
             return None
     
+    def _iter_template_chunks(self, template, columns, data_lines):
+        render = template.__mod__
+        for start in range(0, data_lines, FLUSH_LINES):
+            size = min(FLUSH_LINES, data_lines - start)
+            if columns:
+                buf = list(map(render, zip(*[column(size) for column in columns])))
+            else:
+                buf = [render(())] * size
+            buf.append('')
+            yield '\n'.join(buf).encode('utf-8')
+
     def generate_filename(self, args, file_index, total_files):
         base_name = args.file_name
         
@@ -212,9 +381,9 @@ class DataGenerator:
         if args.file_prefix == 'count':
             return f"{base_name}_{file_index + 1}.json"
         elif args.file_prefix == 'random':
-            return f"{base_name}_{random.randint(1000, 9999)}.json"
+            return f"{base_name}_{self._rng.randint(1000, 9999)}.json"
         elif args.file_prefix == 'uuid':
-            return f"{base_name}_{uuid.uuid4()}.json"
+            return f"{base_name}_{_uuid4_str()}.json"
         else:
             return f"{base_name}.json"
     
@@ -222,15 +391,26 @@ class DataGenerator:
         if not args.clear_path:
             return
         
-        pattern = f"{args.file_name}*.json"
+        prefix = args.file_name
         cleared_count = 0
         
-        for file_path in Path(args.path_to_save_files).glob(pattern):
-            try:
-                file_path.unlink()
-                cleared_count += 1
-            except Exception as e:
-                self.logger.warning(f"Could not delete {file_path}: {e}")
+        try:
+            entries = os.scandir(args.path_to_save_files)
+        except FileNotFoundError:
+            return
+        
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if not (name.startswith(prefix) and name.endswith('.json')):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    os.unlink(entry.path)
+                    cleared_count += 1
+                except Exception as e:
+                    self.logger.warning(f"Could not delete {entry.path}: {e}")
         
         if cleared_count > 0:
             self.logger.info(f"Cleared {cleared_count} existing files")
@@ -330,6 +510,7 @@ class MagicGenerator:
         
         if args.files_count != 0:
             os.makedirs(args.path_to_save_files, exist_ok=True)
+            args.filepath_prefix = os.path.join(args.path_to_save_files, '')
         
         if args.files_count < 0:
             self.generator.logger.error("files_count must be >= 0")
@@ -349,60 +530,72 @@ class MagicGenerator:
             args.multiprocessing = cpu_count
         
         args.data_schema = self.generator.parse_schema(args.data_schema)
+
+    def _compile_output(self, args):
+        if args.files_count == 0:
+            return self.generator.compile_line(self.generator.compile_schema(args.data_schema)), None
+        return None, self.generator.compile_template(args.data_schema)
     
-    def generate_data_parallel(self, args):
+    def generate_data_parallel(self, args, *, generate_line=None, template=None):
+        if generate_line is None and template is None:
+            generate_line, template = self._compile_output(args)
+
         if args.files_count == 0:
-            for i in range(args.data_lines):
-                line = self.generator.generate_line(args.data_schema)
-                print(json.dumps(line))
+            self._emit_stdout(generate_line, args.data_lines)
+            return
+
+        if args.multiprocessing == 1 or args.files_count == 1:
+            for i in range(args.files_count):
+                self.generator.generate_file(args, i, args.files_count, template)
             return
 
-        files_per_process = max(1, args.files_count // args.multiprocessing)
+        chunksize = max(1, args.files_count // (4 * args.multiprocessing))
 
         self.generator.logger.info(f"Starting {args.multiprocessing} processes for {args.files_count} files")
 
-        with multiprocessing.Pool(processes=args.multiprocessing) as pool:
-            results = []
-            for i in range(args.multiprocessing):
-                start_idx = i * files_per_process
-                end_idx = start_idx + files_per_process
-                if i == args.multiprocessing - 1:
-                    end_idx = args.files_count
-
-                files_to_generate = end_idx - start_idx
-                if files_to_generate > 0:
-                    result = pool.apply_async(
-                        self.generate_files_chunk,
-                        (args, start_idx, files_to_generate)
-                    )
-                    results.append(result)
-
-            for result in results:
-                result.get()
+        with ProcessPoolExecutor(
+            max_workers=args.multiprocessing,
+            mp_context=_pool_context(),
+            initializer=_init_worker,
+            initargs=(self.defaults, args.data_schema)
+        ) as pool:
+            tasks = pool.map(
+                functools.partial(_generate_one_file, args),
+                range(args.files_count),
+                chunksize=chunksize
+            )
+            for _ in tasks:
+                pass
     
-    def generate_files_chunk(self, args, start_index, num_files):
-        generator = DataGenerator(self.defaults)
-        for i in range(num_files):
-            generator.generate_file(args, start_index + i, args.files_count)
+    def _emit_stdout(self, generate_line, count):
+        sys.stdout.flush()
+        out = getattr(sys.stdout, 'buffer', None)
+        if out is None:
+            for i in range(count):
+                print(_ENCODE_ASCII(generate_line()))
+            return
+
+        write = out.write
+        for i in range(count):
+            line = generate_line()
+            try:
+                data = _dumps(line)
+            except (TypeError, ValueError):
+                data = _ENCODE_ASCII(line).encode('ascii')
+            write(data + b'\n')
+        out.flush()
     
     def run(self):
         try:
             args = self.parse_arguments()
+            self.validate_arguments(args)
+            generate_line, template = self._compile_output(args)
             self.generator.logger.info("Starting data generation")
             
             if args.clear_path:
                 self.generator.clear_path(args)
             
-            if args.multiprocessing > 1 and args.files_count > 1:
-                self.generate_data_parallel(args)
-            else:
-                if args.files_count == 0:
-                    for i in range(args.data_lines):
-                        line = self.generator.generate_line(args.data_schema)
-                        print(json.dumps(line))
-                else:
-                    for i in range(args.files_count):
-                        self.generator.generate_file(args, i, args.files_count)
+            self.generate_data_parallel(args, generate_line=generate_line, template=template)
             
             self.generator.logger.info("Data generation completed successfully")
             
@@ -414,6 +607,26 @@ class MagicGenerator:
             sys.exit(1)
 
 
+_WORKER = {}
+
+
+def _pool_context():
+    if sys.platform.startswith('linux'):
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def _init_worker(defaults, schema):
+    generator = DataGenerator(defaults)
+    generator.seed(os.getpid() ^ time.time_ns())
+    _WORKER['gen'] = generator
+    _WORKER['template'] = generator.compile_template(schema)
+
+
+def _generate_one_file(args, file_index):
+    return _WORKER['gen'].generate_file(args, file_index, args.files_count, _WORKER['template'])
+
+
 def main():
     generator = MagicGenerator()
     generator.run()
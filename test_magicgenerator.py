@@ -1,6 +1,10 @@
 import pytest
 import json
-from magicgenerator import DataGenerator, MagicGenerator
+import os
+import multiprocessing
+import uuid
+import magicgenerator
+from magicgenerator import FLUSH_LINES, DataGenerator, MagicGenerator
 
 
 class TestDataGenerator:
@@ -21,7 +25,15 @@ class TestDataGenerator:
         schema = self.generator.parse_schema(str(schema_file))
         assert schema["date"] == "timestamp:"
         assert schema["type"] == "str:['a','b']"
-    
+
+    def test_parse_schema_from_file_reloads_on_change(self, tmp_path):
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(json.dumps({"name": "str:a"}))
+        assert self.generator.parse_schema(str(schema_file)) == {"name": "str:a"}
+
+        schema_file.write_text(json.dumps({"name": "str:b"}))
+        assert self.generator.parse_schema(str(schema_file)) == {"name": "str:b"}
+
     @pytest.mark.parametrize("field_type,value_spec,expected_type", [
         ("timestamp", "", str),
         ("str", "rand", str),
@@ -53,6 +65,7 @@ class TestDataGenerator:
         result = self.generator.generate_string("rand")
         assert isinstance(result, str)
         assert len(result) == 36  
+        assert uuid.UUID(result).version == 4
     
     def test_generate_string_from_list(self):
         result = self.generator.generate_string('["a","b","c"]')
@@ -66,6 +79,62 @@ class TestDataGenerator:
         result = self.generator.generate_integer("[1,2,3,4,5]")
         assert result in [1, 2, 3, 4, 5]
 
+    def test_compile_schema(self):
+        schema = {"id": "str:rand", "age": "int:rand(1, 3)", "kind": "str:['a','b']", "n": "int:7"}
+        compiled = self.generator.compile_schema(schema)
+        assert [key for key, _ in compiled] == ["id", "age", "kind", "n"]
+
+        line = self.generator.generate_line(compiled)
+        assert len(line["id"]) == 36
+        assert 1 <= line["age"] <= 3
+        assert line["kind"] in ["a", "b"]
+        assert line["n"] == 7
+
+    def test_compile_line(self):
+        schema = {"first name": "str:ann", "it's": "int:[1]", "class": "int:rand(2, 2)"}
+        generate_line = self.generator.compile_line(self.generator.compile_schema(schema))
+        assert generate_line() == {"first name": "ann", "it's": 1, "class": 2}
+
+    @pytest.mark.parametrize("size", [20, FLUSH_LINES])
+    def test_compile_template(self, size):
+        schema = {
+            "id": "str:rand",
+            "quote": 'str:say "hi" 100%',
+            "kind": "str:['a\\\\b']",
+            "date": "timestamp:",
+            "age": "int:rand(1, 3)",
+            "flag": "int:[true, null]",
+            "n": "int:7",
+            "empty": "int:",
+        }
+        template, columns = self.generator.compile_template(schema)
+        assert len(columns) == 5
+
+        for row in zip(*[column(size) for column in columns]):
+            line = json.loads(template % row)
+            assert list(line) == list(schema)
+            assert len(line["id"]) == 36
+            assert line["quote"] == 'say "hi" 100%'
+            assert line["kind"] == "a\\b"
+            float(line["date"])
+            assert 1 <= line["age"] <= 3
+            assert line["flag"] in [True, None]
+            assert line["n"] == 7
+            assert line["empty"] is None
+
+    @pytest.mark.parametrize("value_spec", [
+        "int:rand(5, 1)",
+        "int:rand(1)",
+        "int:abc",
+        "str:rand(1, 2)",
+        "str:[a, b]",
+    ])
+    def test_compile_schema_rejects_invalid_specs(self, value_spec):
+        with pytest.raises(SystemExit):
+            self.generator.compile_schema({"field": value_spec})
+        with pytest.raises(SystemExit):
+            self.generator.compile_template({"field": value_spec})
+
 
 class DummyArgs:
     def __init__(self, path_to_save_files, files_count, file_name, file_prefix, 
@@ -93,6 +162,7 @@ class TestMagicGenerator:
         
         for file in test_files:
             file.write_text("test content")
+        (tmp_path / "data_dir.json").mkdir()
         
         args = DummyArgs(
             path_to_save_files=str(tmp_path),
@@ -110,6 +180,7 @@ class TestMagicGenerator:
         assert not (tmp_path / "data_1.json").exists()
         assert not (tmp_path / "data_2.json").exists()
         assert (tmp_path / "other_file.txt").exists()
+        assert (tmp_path / "data_dir.json").is_dir()
     
     def test_file_generation_single(self, tmp_path):
         schema = {"name": "str:rand", "count": "int:rand(1,5)"}
@@ -137,6 +208,63 @@ class TestMagicGenerator:
                 assert "name" in data
                 assert "count" in data
     
+    def test_file_generation_escapes_lone_surrogates(self, tmp_path):
+        args = DummyArgs(
+            path_to_save_files=str(tmp_path),
+            files_count=1,
+            file_name="surrogate",
+            file_prefix="count",
+            data_schema=json.loads('{"s\\udc00": "str:[\\"\\\\ud800\\"]", "c": "str:\\u00e9"}'),
+            data_lines=2,
+            clear_path=False,
+            multiprocessing=1
+        )
+
+        assert self.magic_gen.generator.generate_file(args, 0, 1) == "surrogate.json"
+        for line in (tmp_path / "surrogate.json").read_text().splitlines():
+            assert json.loads(line) == {"s\udc00": "\ud800", "c": "\u00e9"}
+
+    def test_file_generation_respects_umask(self, tmp_path):
+        args = DummyArgs(
+            path_to_save_files=str(tmp_path),
+            files_count=1,
+            file_name="perm",
+            file_prefix="count",
+            data_schema={"n": "int:1"},
+            data_lines=1,
+            clear_path=False,
+            multiprocessing=1
+        )
+
+        old_umask = os.umask(0o002)
+        try:
+            self.magic_gen.generator.generate_file(args, 0, 1)
+            with open(tmp_path / "plain.json", 'w'):
+                pass
+        finally:
+            os.umask(old_umask)
+
+        assert (tmp_path / "perm.json").stat().st_mode == (tmp_path / "plain.json").stat().st_mode
+
+    def test_file_generation_reports_row_errors(self, tmp_path, caplog):
+        args = DummyArgs(
+            path_to_save_files=str(tmp_path),
+            files_count=1,
+            file_name="broken",
+            file_prefix="count",
+            data_schema={},
+            data_lines=FLUSH_LINES + 1,
+            clear_path=False,
+            multiprocessing=1
+        )
+
+        def failing_column(size):
+            raise RuntimeError("column failed")
+
+        template = ('{"id":%s}', [failing_column])
+        assert self.magic_gen.generator.generate_file(args, 0, 1, template) is None
+        assert "column failed" in caplog.text
+
     def test_multiprocessing_file_count(self, tmp_path):
         schema = {"id": "int:rand"}
         
@@ -159,7 +287,53 @@ class TestMagicGenerator:
         expected_files = {"multi_1.json", "multi_2.json", "multi_3.json", "multi_4.json"}
         actual_files = {f.name for f in tmp_path.glob("*.json")}
         assert expected_files == actual_files
+
+    def test_file_generation_reuses_template(self, tmp_path):
+        args = DummyArgs(
+            path_to_save_files=str(tmp_path),
+            files_count=2,
+            file_name="shared",
+            file_prefix="count",
+            data_schema={"id": "int:rand(1, 3)", "kind": "str:['a']"},
+            data_lines=4,
+            clear_path=False,
+            multiprocessing=1
+        )
+
+        template = self.magic_gen.generator.compile_template(args.data_schema)
+        for i in range(args.files_count):
+            self.magic_gen.generator.generate_file(args, i, args.files_count, template)
+
+        for name in ("shared_1.json", "shared_2.json"):
+            lines = (tmp_path / name).read_text().splitlines()
+            assert len(lines) == 4
+            for line in lines:
+                data = json.loads(line)
+                assert 1 <= data["id"] <= 3
+                assert data["kind"] == "a"
     
+    def test_generate_data_parallel_with_pool(self, tmp_path):
+        args = DummyArgs(
+            path_to_save_files=str(tmp_path),
+            files_count=4,
+            file_name="pool",
+            file_prefix="count",
+            data_schema={"id": "int:rand(1, 9)", "name": "str:rand"},
+            data_lines=7,
+            clear_path=False,
+            multiprocessing=2
+        )
+
+        self.magic_gen.generate_data_parallel(args)
+
+        expected_files = {f"pool_{i}.json" for i in range(1, 5)}
+        assert {f.name for f in tmp_path.glob("*.json")} == expected_files
+        for name in expected_files:
+            lines = (tmp_path / name).read_text().splitlines()
+            assert len(lines) == 7
+            for line in lines:
+                assert 1 <= json.loads(line)["id"] <= 9
+
     def test_filename_generation(self, tmp_path):
         generator = DataGenerator()
         
@@ -220,7 +394,60 @@ class TestMagicGenerator:
         for line in output_lines:
             data = json.loads(line)
             assert data["message"] == "hello"
+
+    def test_console_output_emits_lines(self, capsys):
+        args = DummyArgs(
+            path_to_save_files=".",
+            files_count=0,
+            file_name="test",
+            file_prefix="count",
+            data_schema={"message": "str:hello", "n": "int:[1]"},
+            data_lines=3,
+            clear_path=False,
+            multiprocessing=1
+        )
+
+        self.magic_gen.generate_data_parallel(args)
+
+        output_lines = capsys.readouterr().out.strip().split('\n')
+        assert [json.loads(line) for line in output_lines] == [{"message": "hello", "n": 1}] * 3
     
+    def test_console_output_escapes_lone_surrogates(self, capsysbinary):
+        args = DummyArgs(
+            path_to_save_files=".",
+            files_count=0,
+            file_name="test",
+            file_prefix="count",
+            data_schema={"s": 'str:["\\ud800"]', "big": "int:rand(18446744073709551616, 18446744073709551616)"},
+            data_lines=2,
+            clear_path=False,
+            multiprocessing=1
+        )
+
+        self.magic_gen.generate_data_parallel(args)
+
+        output_lines = capsysbinary.readouterr().out.splitlines()
+        assert [json.loads(line) for line in output_lines] == [{"s": "\ud800", "big": 1 << 64}] * 2
+
+    @pytest.mark.parametrize("files_count", [0, 2])
+    def test_timestamp_spec_warns_once(self, tmp_path, capsys, caplog, files_count):
+        args = DummyArgs(
+            path_to_save_files=str(tmp_path),
+            files_count=files_count,
+            file_name="stamp",
+            file_prefix="count",
+            data_schema='{"t": "timestamp:x"}',
+            data_lines=2,
+            clear_path=False,
+            multiprocessing=1
+        )
+
+        assert self.magic_gen.validate_arguments(args) is None
+        generate_line, template = self.magic_gen._compile_output(args)
+        self.magic_gen.generate_data_parallel(args, generate_line=generate_line, template=template)
+
+        assert caplog.text.count("ignores value specification") == 1
+
     def test_schema_validation(self):
         generator = DataGenerator()
         
@@ -236,6 +463,12 @@ class TestMagicGenerator:
         with pytest.raises(SystemExit):
             generator.validate_schema({"name": "str_rand"})
 
+    @pytest.mark.parametrize("platform,start_method", [("linux", "fork"), ("darwin", None)])
+    def test_pool_context_forks_only_on_linux(self, monkeypatch, platform, start_method):
+        monkeypatch.setattr(magicgenerator.sys, "platform", platform)
+        expected = start_method or multiprocessing.get_context().get_start_method()
+        assert magicgenerator._pool_context().get_start_method() == expected
+
 
 class TestIntegration:
     def test_end_to_end_generation(self, tmp_path):